@@ -4,6 +4,13 @@ import requests.exceptions
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import os
+import glob
+import mimetypes
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 
 def display_springer_constraints(constraints_url='https://dev.springernature.com/adding-constraints', table_number=1):
     """
@@ -130,6 +137,123 @@ def get_creators_series(creator_column):
     creators_Series = pd.Series(newcreatorlist)
     return creators_Series
 
+def get_creators_list_series(creator_column):
+    """
+    Returns a pandas Series in which each element is the list of creators' names for one record. Unlike get_creators_series, the names are kept as a list rather than joined into a single string, so that individual authors can be looked up exactly.
+    This function is not meant for the user, but to process a column in the dataframe containing the JSON response to the GET request from Springer Nature.
+
+    Parameters
+    ----------
+    creator_column: list. A list of lists containing dictionaries.
+
+    Returns
+    -------
+    creators_list_Series. A pandas Series of lists of creators' names.
+
+    Examples
+    --------
+    >>> get_creators_list_series([[{'creator': 'Wells, William'}], [{'creator': 'Parks, William C'}, {'creator': 'Shapiro, Steven D'}]])
+    0                         [Wells, William]
+    1    [Parks, William C, Shapiro, Steven D]
+    dtype: object
+    """
+    newcreatorlist = []
+    for list_of_dicts in creator_column:
+        list_of_author_names = []
+        if not isinstance(list_of_dicts, float):
+            list_of_author_names = [dict(kv_pair)['creator'] for kv_pair in list_of_dicts]
+        newcreatorlist.append(list_of_author_names)
+    creators_list_Series = pd.Series(newcreatorlist, dtype=object)
+    return creators_list_Series
+
+def get_shingles(texts, shingle_size=5):
+    """
+    Returns the hashed character shingles (substrings of length shingle_size) of a list of texts, with the position in texts of the text each shingle comes from.
+    Each text is lower-cased and its whitespace collapsed first, so that formatting differences do not change the shingles. The texts are then joined and all of their shingles hashed at once.
+    This function is not meant for the user, but for use within get_minhash_signatures.
+
+    Parameters
+    ----------
+    texts: list. A list of strings to be shingled. Non-string values (e.g. NaN) are treated as empty text.
+    shingle_size: int. The number of characters in each shingle. (Default is 5).
+
+    Returns
+    -------
+    shingles. A NumPy array of 32-bit shingle hashes, unique within each text.
+    rows. A NumPy array, sorted in ascending order, of the position in texts of the text each shingle comes from. Empty texts have no shingles.
+
+    Examples
+    --------
+    >>> get_shingles(['Genome  Biology', 'Genome'], shingle_size=5)
+    (array([1300511791, 2175131466, 2263353762, 2363462004, 2636006475,
+           2828830148, 3487048862, 4055953997, 4113322843, 4240215607,
+           2175131466, 2636006475], dtype=uint64), array([0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1]))
+    """
+    normalized = [' '.join(text.lower().split()) if isinstance(text, str) else '' for text in texts]
+    # texts shorter than a shingle are padded, so that they have a single shingle
+    normalized = [text.ljust(shingle_size, '\0') if len(text) > 0 else '' for text in normalized]
+    lengths = np.array([len(text) for text in normalized], dtype=np.int64)
+    num_windows = np.maximum(lengths - shingle_size + 1, 0)
+    if num_windows.sum() == 0:
+        return np.array([], dtype=np.uint64), np.array([], dtype=np.int64)
+    codes = np.frombuffer(''.join(normalized).encode('utf-32-le'), dtype='<u4').astype(np.uint64)
+
+    # polynomial rolling hash of every window at once; uint64 arithmetic wraps around on overflow
+    powers = np.uint64(0x9E3779B97F4A7C15) ** np.arange(shingle_size, dtype=np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(codes, shingle_size)
+    hashes = (windows * powers).sum(axis=1, dtype=np.uint64) >> np.uint64(32)
+
+    # keep only the windows that lie within a single text
+    rows = np.repeat(np.arange(len(normalized), dtype=np.int64), num_windows)
+    window_starts = np.cumsum(lengths) - lengths
+    first_window = np.cumsum(num_windows) - num_windows
+    positions = window_starts[rows] + np.arange(len(rows)) - first_window[rows]
+    keys = np.unique((rows.astype(np.uint64) << np.uint64(32)) | hashes[positions])
+    shingles = keys & np.uint64(0xFFFFFFFF)
+    rows = (keys >> np.uint64(32)).astype(np.int64)
+    return shingles, rows
+
+def get_minhash_signatures(texts, num_perm=128, shingle_size=5, seed=1):
+    """
+    Returns the MinHash signature of each piece of text, which can be compared to estimate the Jaccard similarity of their shingles.
+    The shingles of all texts are computed together, and each hash function is applied to all of them at once, with the minimum for each text taken by np.minimum.reduceat.
+    The hash functions are generated from seed, so signatures computed in separate calls with the same parameters can be compared.
+    This function is not meant for the user, but for use within the ResultsAnalysis member function compute_minhash.
+
+    Parameters
+    ----------
+    texts: list. A list of strings. Non-string values (e.g. NaN) are treated as empty text.
+    num_perm: int. The number of hash functions, i.e. the length of each signature. (Default is 128).
+    shingle_size: int. The number of characters in each shingle. (Default is 5).
+    seed: int. The seed used to generate the hash functions. (Default is 1).
+
+    Returns
+    -------
+    signatures. A NumPy array of shape (len(texts), num_perm). The signature of an empty text is filled with the maximum uint64 value.
+
+    Examples
+    --------
+    >>> get_minhash_signatures(['And the winner is...', 'Calling all binding sites'], num_perm=4)
+    array([[ 53972499817686377, 271971744553839040, 133797361843329638,
+             89996278734450256],
+           [108096005148973435,  41801416089583718,  86798618775301111,
+            197875327271140852]], dtype=uint64)
+    """
+    mersenne_prime = np.uint64((1 << 61) - 1)
+    random_state = np.random.RandomState(seed)
+    # shingles are 32-bit, so a * shingle + b stays below 2**64 and the modulo is exact
+    a = random_state.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+    b = random_state.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+    signatures = np.full((len(texts), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    shingles, rows = get_shingles(texts, shingle_size)
+    if len(shingles) == 0:
+        return signatures
+    non_empty_rows, offsets = np.unique(rows, return_index=True)
+    # one hash function at a time, so that memory stays proportional to the number of shingles
+    for i in range(num_perm):
+        signatures[non_empty_rows, i] = np.minimum.reduceat((a[i] * shingles + b[i]) % mersenne_prime, offsets)
+    return signatures
+
 def check_parameters(api_key, number_of_results, kwargs_dict):
     """
     Checks whether parameters intended for the function search_nature are valid. Raises errors if inappropriate values exist.
@@ -196,6 +320,7 @@ def search_nature(api_key, number_of_results, **kwargs):
             Name: url, dtype=object
             Name: title, dtype=object
             Name: creators, dtype=object
+            Name: creatorsList, dtype=object
             Name: publicationName, dtype=object
             Name: openaccess, dtype=object
             Name: doi, dtype=object
@@ -239,6 +364,7 @@ def search_nature(api_key, number_of_results, **kwargs):
     
     creators_column = [creators for creators in results['creators']]
     results['creators'] = get_creators_series(creators_column)
+    results.insert(results.columns.get_loc('creators') + 1, 'creatorsList', get_creators_list_series(creators_column))
     
     return results
 
@@ -256,6 +382,20 @@ class ResultsAnalysis:
         the column names of the DataFrame results_df
     colnames_string : str
         a string representation of all the column names of the DataFrame results_df
+    author_index : dict
+        maps each author's name to a NumPy array of the row ids of results_df that the author 
+        appears in. Built on demand by build_author_index, and None until then.
+    coauthor_matrix : pandas.Series
+        a sparse co-authorship matrix, stored as a Series of counts indexed by the sorted 
+        MultiIndex (author, coauthor). Built on demand by build_coauthor_matrix, and None until then.
+    author_counts : pandas.Series
+        the number of rows of results_df that each author appears in, in descending order. 
+        Built on demand by build_author_index, and None until then.
+    minhash_signatures : numpy.ndarray
+        the MinHash signature of each row of results_df, in the same order as its rows. 
+        Computed by compute_minhash, kept up to date by add_row and remove_rows, and None until then.
+    minhash_params : dict
+        the column, num_perm and shingle_size that minhash_signatures were computed with.
 
     Methods
     -------
@@ -276,6 +416,21 @@ class ResultsAnalysis:
         Returns a DataFrame subset of results_df, for which the column (specified by the parameter 'column') 
         contains any or all (depending on the value of or_and specified) of the search terms specified in *args. 
         or_and defaults to 'or'.
+    build_author_index()
+        Builds author_index and author_counts from the creators of each row of results_df
+    build_coauthor_matrix(max_authors=100)
+        Builds coauthor_matrix from the rows of results_df with at most max_authors creators
+    search_author(author)
+        Returns a DataFrame subset of results_df for the rows in which 'author' is one of the creators
+    top_authors(n=10)
+        Returns the n authors with the most rows in results_df
+    get_coauthors(author)
+        Returns the number of rows that each coauthor of 'author' shares with them
+    compute_minhash(column='abstract', num_perm=128, shingle_size=5)
+        Computes the MinHash signature of each row of results_df, based on the text in the column 'column'
+    find_near_duplicates(column='abstract', threshold=0.8, bands=16)
+        Returns a DataFrame subset of results_df of the rows whose text in the column 'column' is nearly 
+        identical to that of another row, labelled by cluster in a 'duplicateCluster' column.
     add_row(entry)
         Appends an additional row, 'entry', to the DataFrame results_df
     remove_rows(n):
@@ -287,6 +442,11 @@ class ResultsAnalysis:
         self.results_df = results_df
         self.colnames = self.results_df.columns 
         self.colnames_string = ', '.join(self.results_df.columns) 
+        self.author_index = None
+        self.author_counts = None
+        self.coauthor_matrix = None
+        self.minhash_signatures = None
+        self.minhash_params = None
     
     def print_head(self):
         """
@@ -402,6 +562,246 @@ class ResultsAnalysis:
         
         return self.search_results        
     
+    def get_creators_lists(self):
+        """Returns the list of creators' names for each row of results_df. 
+        This function is not intended for the user but as a function to be used in the build_author_index function.
+        The 'creatorsList' column is used where it holds a list, and the 'creators' column is split on '; ' otherwise 
+        (e.g. for rows added with add_row, or DataFrames loaded from a CSV file).
+
+        Returns
+        -------
+        creators_lists : Series
+            A Series, with the same index as results_df, of lists of creators' names.
+        """
+        if 'creators' in self.results_df.columns:
+            creators_lists = self.results_df['creators'].fillna('').astype(str).str.split('; ')
+        else:
+            creators_lists = pd.Series([[] for i in range(len(self.results_df))], index=self.results_df.index, dtype=object)
+        if 'creatorsList' in self.results_df.columns:
+            structured = self.results_df['creatorsList']
+            creators_lists = structured.where(structured.map(lambda x: isinstance(x, list)), creators_lists)
+        return creators_lists
+
+    def get_author_pairs(self):
+        """Returns one (row id, author) pair for each creator of each row of results_df. 
+        This function is not intended for the user but as a function to be used in the build_author_index 
+        and build_coauthor_matrix functions.
+
+        Returns
+        -------
+        pairs : DataFrame
+            A DataFrame with the columns 'row' and 'author', without repeated pairs.
+        """
+        pairs = self.get_creators_lists().explode().dropna()
+        pairs = pairs[pairs != '']
+        pairs = pd.DataFrame({'row': pairs.index, 'author': pairs.to_numpy()}).drop_duplicates()
+        return pairs
+
+    def build_author_index(self):
+        """Builds author_index and author_counts from the creators of each row of results_df, 
+        so that search_author and top_authors do not have to scan every row.
+        The index is rebuilt automatically after add_row or remove_rows change results_df.
+
+        Returns
+        -------
+        author_index : dict
+            A dictionary mapping each author's name to a NumPy array of the row ids it appears in.
+        """
+        pairs = self.get_author_pairs()
+        self.author_index = {author: rows.to_numpy() for author, rows in pd.Index(pairs['row']).groupby(pairs['author'].to_numpy()).items()}
+        self.author_counts = pairs['author'].value_counts().rename_axis(None).rename(None)
+        return self.author_index
+
+    def build_coauthor_matrix(self, max_authors=100):
+        """Builds coauthor_matrix from the creators of each row of results_df, so that get_coauthors 
+        does not have to scan every row. Every pair of authors of a row is an entry of the matrix, 
+        so rows with more than max_authors creators (e.g. large collaboration papers) are left out.
+        The matrix is rebuilt automatically after add_row or remove_rows change results_df.
+
+        Parameters
+        ----------
+        max_authors : int
+            The maximum number of creators of a row for it to be included in the matrix. (Default is 100).
+
+        Returns
+        -------
+        coauthor_matrix : Series
+            The number of rows shared by each pair of authors, indexed by the sorted MultiIndex (author, coauthor).
+        """
+        pairs = self.get_author_pairs()
+        pairs = pairs[pairs.groupby('row')['author'].transform('size') <= max_authors]
+        # integer codes keep the self-merge and the counting cheap
+        author_codes, authors = pd.factorize(pairs['author'])
+        coded = pd.DataFrame({'row': pd.factorize(pairs['row'])[0], 'author': author_codes})
+        coauthor_pairs = coded.merge(coded, on='row', suffixes=('', '_co'))
+        coauthor_pairs = coauthor_pairs[coauthor_pairs['author'] != coauthor_pairs['author_co']]
+        keys, counts = np.unique(coauthor_pairs['author'].to_numpy(dtype=np.int64) * len(authors) + coauthor_pairs['author_co'].to_numpy(dtype=np.int64), return_counts=True)
+        index = pd.MultiIndex.from_arrays([authors[keys // max(len(authors), 1)], authors[keys % max(len(authors), 1)]], names=['author', 'coauthor'])
+        self.coauthor_matrix = pd.Series(counts, index=index).sort_index()
+        return self.coauthor_matrix
+
+    def search_author(self, author):
+        """Returns a DataFrame subset of results_df, for the rows in which 'author' is one of the creators. 
+        Unlike search_column('creators', author), only exact matches of the author's full name are returned.
+
+        Parameters
+        ----------
+        author : str
+            The author's name, in the format used by Springer Nature (e.g. 'Wells, William').
+
+        Returns
+        -------
+        search_results. A DataFrame subset of results_df.
+        """
+        if self.author_index is None:
+            self.build_author_index()
+        rows = self.author_index.get(author, np.array([], dtype=self.results_df.index.dtype))
+        self.search_results = self.results_df.loc[rows]
+        return self.search_results
+
+    def top_authors(self, n=10):
+        """Returns the n authors with the most rows in results_df.
+
+        Parameters
+        ----------
+        n : int
+            The number of authors to return. (Default is 10).
+
+        Returns
+        -------
+        author_counts : Series
+            The number of rows for each of the top n authors, in descending order.
+        """
+        if self.author_index is None:
+            self.build_author_index()
+        return self.author_counts.head(n)
+
+    def get_coauthors(self, author):
+        """Returns the coauthors of 'author', and the number of rows of results_df that each shares with them.
+        Rows with more creators than the max_authors of build_coauthor_matrix are not counted.
+
+        Parameters
+        ----------
+        author : str
+            The author's name, in the format used by Springer Nature (e.g. 'Wells, William').
+
+        Returns
+        -------
+        coauthors : Series
+            The number of shared rows, indexed by coauthor, in descending order.
+        """
+        if self.author_index is None:
+            self.build_author_index()
+        if self.coauthor_matrix is None:
+            self.build_coauthor_matrix()
+        if author not in self.author_index:
+            raise ValueError(f"'{author}' is not a creator of any entry. Please check the spelling, e.g. 'Wells, William'.")
+        try:
+            coauthors = self.coauthor_matrix.xs(author, level='author')
+        except KeyError:
+            # the author has only ever been the sole creator of an entry, or a creator of rows left out of the matrix
+            return pd.Series(dtype=int, name='coauthors')
+        return coauthors.sort_values(ascending=False).rename('coauthors')
+
+    def compute_minhash(self, column='abstract', num_perm=128, shingle_size=5):
+        """Computes the MinHash signature of each row of results_df, based on the text in a column. 
+        The signatures are stored in minhash_signatures, and are updated row by row by add_row and remove_rows 
+        rather than being recomputed.
+
+        Parameters
+        ----------
+        column : str
+            The column of results_df containing the text, e.g. 'abstract' or 'title'. (Default is 'abstract').
+        num_perm : int
+            The number of hash functions, i.e. the length of each signature. (Default is 128).
+        shingle_size : int
+            The number of characters in each shingle. (Default is 5).
+
+        Returns
+        -------
+        minhash_signatures : ndarray
+            An array of shape (number of rows of results_df, num_perm).
+        """
+        if column not in self.colnames:
+            raise ValueError(f"There is no column titled '{column}'. Please try the following columns instead:\n" + self.colnames_string)
+        self.minhash_params = {'column': column, 'num_perm': num_perm, 'shingle_size': shingle_size}
+        self.minhash_signatures = get_minhash_signatures(list(self.results_df[column]), num_perm, shingle_size)
+        return self.minhash_signatures
+
+    def find_near_duplicates(self, column='abstract', threshold=0.8, bands=16, window=10):
+        """Returns the rows of results_df whose text in a column is nearly identical to that of another row, 
+        e.g. preprints, corrections and re-published versions of the same document with different DOIs.
+        Rows with identical signatures are grouped first, so that boilerplate text shared by many rows costs 
+        a single comparison. The remaining signatures are split into bands, and within each group of signatures 
+        sharing a band, each signature is compared with the next 'window' signatures in sorted order, so that 
+        the number of comparisons grows linearly with the number of rows. Pairs are kept if their estimated 
+        Jaccard similarity is at least threshold. Rows with empty text are never reported.
+
+        Parameters
+        ----------
+        column : str
+            The column of results_df containing the text, e.g. 'abstract' or 'title'. (Default is 'abstract').
+        threshold : float
+            The minimum estimated Jaccard similarity, between 0 and 1, for two rows to be near-duplicates. (Default is 0.8).
+        bands : int
+            The number of bands each signature is split into. It must divide the signature length. 
+            More bands find less similar candidates, at the cost of more comparisons. (Default is 16).
+        window : int
+            The number of following signatures each signature is compared with, in each band. (Default is 10).
+
+        Returns
+        ----------
+        near_duplicates. A DataFrame subset of results_df with an additional column, 'duplicateCluster', 
+        which is the same for rows that are near-duplicates of each other.
+        """
+        if self.minhash_signatures is None or self.minhash_params['column'] != column:
+            self.compute_minhash(column)
+        num_perm = self.minhash_signatures.shape[1]
+        if num_perm % bands != 0:
+            raise ValueError(f"bands must divide the signature length, {num_perm}. Please specify a different number of bands.")
+
+        # rows with identical signatures are one cluster, so only the unique signatures need comparing
+        non_empty_rows = np.flatnonzero(~(self.minhash_signatures == np.iinfo(np.uint64).max).all(axis=1))
+        signatures, unique_ids, group_sizes = np.unique(self.minhash_signatures[non_empty_rows], axis=0, return_inverse=True, return_counts=True)
+        unique_ids = unique_ids.ravel()
+        num_unique = len(signatures)
+
+        # one hash per band per signature, computed for all signatures at once; the powers make the hash depend on the order of the values
+        powers = np.uint64(0x9E3779B97F4A7C15) ** np.arange(1, num_perm // bands + 1, dtype=np.uint64)
+        band_keys = (signatures.reshape(num_unique, bands, num_perm // bands) * powers).sum(axis=2, dtype=np.uint64)
+        band = np.tile(np.arange(bands), num_unique)
+        key = band_keys.ravel()
+        signature_id = np.repeat(np.arange(num_unique), bands)
+        # np.unique sorts the signatures, so neighbours within a bucket are the most alike
+        order = np.lexsort((signature_id, key, band))
+        band, key, signature_id = band[order], key[order], signature_id[order]
+        first, second = [], []
+        for offset in range(1, min(window, len(key) - 1) + 1):
+            same_bucket = (band[offset:] == band[:-offset]) & (key[offset:] == key[:-offset])
+            first.append(signature_id[:-offset][same_bucket])
+            second.append(signature_id[offset:][same_bucket])
+        candidates = np.unique(np.stack([np.concatenate(first + [[]]), np.concatenate(second + [[]])]).astype(np.int64), axis=1)
+        similarity = (signatures[candidates[0]] == signatures[candidates[1]]).mean(axis=1)
+        candidates = candidates[:, similarity >= threshold]
+
+        # connected components by label propagation, so that chains of near-duplicates end up in a single cluster
+        labels = np.arange(num_unique)
+        while True:
+            new_labels = labels.copy()
+            np.minimum.at(new_labels, candidates[0], labels[candidates[1]])
+            np.minimum.at(new_labels, candidates[1], labels[candidates[0]])
+            new_labels = new_labels[new_labels]
+            if (new_labels == labels).all():
+                break
+            labels = new_labels
+        duplicated = group_sizes > 1
+        duplicated[candidates.ravel()] = True
+
+        in_cluster = duplicated[unique_ids]
+        near_duplicates = self.results_df.iloc[non_empty_rows[in_cluster]].copy()
+        near_duplicates['duplicateCluster'] = pd.factorize(labels[unique_ids[in_cluster]])[0]
+        return near_duplicates.sort_values('duplicateCluster', kind='stable')
+
     def add_row(self, entry):
         """Appends an additional row, 'entry', to the DataFrame results_df. 
         This changes the contents of results_df but DOES NOT push the result to the Springer database.
@@ -422,6 +822,13 @@ class ResultsAnalysis:
                 raise ValueError(f"There is no column titled '{key}'. Please specify values for any of the following columns instead:\n" + self.colnames_string + '.\nThe right format is: {\'Column name\':\'value\'}')
         entry = pd.DataFrame([entry]) # https://stackoverflow.com/questions/17839973/constructing-pandas-dataframe-from-values-in-variables-gives-valueerror-if-usi
         self.results_df = pd.concat([self.results_df, entry], ignore_index=True)
+        self.author_index = None
+        self.author_counts = None
+        self.coauthor_matrix = None
+        if self.minhash_signatures is not None:
+            # only the new row needs to be shingled and hashed
+            new_signature = get_minhash_signatures(list(entry.reindex(columns=[self.minhash_params['column']]).iloc[:, 0]), self.minhash_params['num_perm'], self.minhash_params['shingle_size'])
+            self.minhash_signatures = np.vstack([self.minhash_signatures, new_signature])
         return self.results_df
     
     def remove_rows(self, n):
@@ -440,6 +847,11 @@ class ResultsAnalysis:
         """
         n = n
         self.results_df = self.results_df[:-n]
+        self.author_index = None
+        self.author_counts = None
+        self.coauthor_matrix = None
+        if self.minhash_signatures is not None:
+            self.minhash_signatures = self.minhash_signatures[:len(self.results_df)]
         return self.results_df
     
     def save_as_csv(self, file_name):
@@ -459,3 +871,156 @@ class ResultsAnalysis:
             raise ValueError(f"'{file_name}' does not end in '.csv'. Please specify a file_name ending in '.csv'")
   
         self.results_df.to_csv(file_name)
+
+def download_document(url, file_path, host_semaphore, chunk_size=65536, api_key=None, file_extension=None):
+    """
+    Streams a single document to file_path + file_extension in chunks, so that the whole document is never held in memory.
+    If the file already exists with a stored ETag (in the file's path + '.etag'), the request is made conditional on that ETag and the file is skipped if the server reports it as unchanged. If the file exists without a stored ETag, it is skipped without a request.
+    This function is not meant for the user, but for use within the function download_documents.
+
+    Parameters
+    ----------
+    url: str. The URL of the document.
+    file_path: str. The path the document will be saved to, without its extension.
+    host_semaphore: threading.Semaphore. Limits the number of concurrent requests to the host of url.
+    chunk_size: int. The number of bytes written to disk at a time. (Default is 65536).
+    api_key: str. If specified, it is added to the query of url for the request only, so that it does not appear in the result. (Default is None).
+    file_extension: str. The extension of the saved file. If None, it is guessed from the Content-Type of the response, e.g. '.html' for 'text/html'. (Default is None).
+
+    Returns
+    -------
+    result. A dictionary with the keys 'url', 'file', 'status' ('downloaded', 'skipped' or 'failed'), 'bytes', 'seconds' and 'error'.
+    """
+    if file_extension is not None:
+        existing_paths = [file_path + file_extension] if os.path.exists(file_path + file_extension) else []
+    else:
+        existing_paths = [path for path in glob.glob(glob.escape(file_path) + '.*') if not path.endswith(('.etag', '.part'))]
+    existing_path = existing_paths[0] if existing_paths else None
+    result = {'url': url, 'file': existing_path, 'status': 'skipped', 'bytes': 0, 'seconds': 0.0, 'error': None}
+    headers = {}
+    if existing_path is not None:
+        if not os.path.exists(existing_path + '.etag'):
+            return result
+        with open(existing_path + '.etag') as etag_file:
+            headers['If-None-Match'] = etag_file.read().strip()
+
+    start = time.perf_counter()
+    part_path = file_path + '.part'
+    try:
+        with host_semaphore:
+            params = {'api_key': api_key} if api_key is not None else None
+            with requests.get(url, params=params, headers=headers, stream=True, timeout=60) as r:
+                r.raise_for_status()
+                if r.status_code == 304:
+                    result['seconds'] = time.perf_counter() - start
+                    return result
+                with open(part_path, 'wb') as part_file:
+                    for chunk in r.iter_content(chunk_size=chunk_size):
+                        part_file.write(chunk)
+                        result['bytes'] += len(chunk)
+                etag = r.headers.get('ETag')
+                if file_extension is None:
+                    content_type = r.headers.get('Content-Type', '').split(';')[0].strip()
+                    # mimetypes can guess unusual extensions for common types, e.g. '.xsl' for 'application/xml'
+                    common_extensions = {'application/xml': '.xml', 'text/xml': '.xml', 'text/html': '.html', 'application/pdf': '.pdf', 'text/plain': '.txt'}
+                    file_extension = common_extensions.get(content_type) or mimetypes.guess_extension(content_type) or ''
+        new_path = file_path + file_extension
+        # only replace the existing file once the download has completed
+        os.replace(part_path, new_path)
+        if existing_path is not None and existing_path != new_path:
+            # the server now returns a different type of document
+            os.remove(existing_path)
+            if os.path.exists(existing_path + '.etag'):
+                os.remove(existing_path + '.etag')
+        if etag is not None:
+            with open(new_path + '.etag', 'w') as etag_file:
+                etag_file.write(etag)
+        elif os.path.exists(new_path + '.etag'):
+            os.remove(new_path + '.etag')
+        result['file'] = new_path
+        result['status'] = 'downloaded'
+    except Exception as err:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        result['status'] = 'failed'
+        result['error'] = str(err)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def download_documents(results_analysis, directory, api_key=None, url_column='url', file_extension=None, max_workers=8, max_per_host=2, chunk_size=65536):
+    """
+    Downloads the documents of the open access entries (where openaccess is 'true') of a ResultsAnalysis object concurrently, streaming each document to disk in chunks.
+    The full text of each document is only downloaded if api_key is specified. Otherwise, whatever the URLs in url_column return is saved: for the results of search_nature, 
+    these are http://dx.doi.org/ links, which return the HTML landing page of each document rather than the document itself.
+    Documents that were already downloaded to directory are skipped, unless the server reports that they have changed (based on their ETag).
+
+    Parameters
+    ----------
+    results_analysis: ResultsAnalysis. The entries whose documents will be downloaded.
+    directory: str. The directory the documents will be saved to. It is created if it does not exist. Each file is named after the DOI of its entry, with '/' replaced by '_'. 
+        Entries with a repeated DOI are only downloaded once, and entries without a DOI are reported as failed.
+    api_key: str. If specified, the full-text JATS XML of each entry is requested from Springer Nature's open access API using its DOI. Otherwise, the URL in url_column is downloaded. 
+        The API key is not included in the URLs of the returned DataFrame. (Default is None).
+    url_column: str. The column of results_df containing the URLs to download, if api_key is not specified. (Default is 'url').
+    file_extension: str. The extension of the saved files. If None, it is '.xml' if api_key is specified, and is guessed from the Content-Type of each response otherwise. (Default is None).
+    max_workers: int. The maximum number of documents downloaded at the same time. (Default is 8).
+    max_per_host: int. The maximum number of documents downloaded at the same time from a single host. (Default is 2).
+    chunk_size: int. The number of bytes written to disk at a time. (Default is 65536).
+
+    Returns
+    -------
+    downloads. A DataFrame with one row per open access entry (the first entry of each repeated DOI), and the columns 'doi', 'url', 'file', 'status' ('downloaded', 'skipped' or 'failed'), 'bytes', 'seconds' and 'error'.
+
+    Examples
+    --------
+    >>> download_documents(ResultsAnalysis(search_nature('redacted_api_key', 10, year=2000, openaccess='true')), 'documents', api_key='redacted_api_key')
+    Downloaded 10 documents (2.31 MB) in 3.02 s: 0.76 MB/s. Skipped 0, failed 0.
+    pandas.DataFrame
+        Columns:
+            Name: doi, dtype=object
+            Name: url, dtype=object
+            Name: file, dtype=object
+            Name: status, dtype=object
+            Name: bytes, dtype=int64
+            Name: seconds, dtype=float64
+            Name: error, dtype=object
+    """
+    if type(max_workers) is not int or type(max_per_host) is not int:
+        raise TypeError("max_workers and max_per_host parameters must be integers")
+    if max_workers < 1 or max_per_host < 1:
+        raise ValueError("max_workers and max_per_host parameters must be at least 1")
+    if api_key is None and url_column not in results_analysis.colnames:
+        raise ValueError(f"There is no column titled '{url_column}'. Please try the following columns instead:\n" + results_analysis.colnames_string)
+
+    open_access = results_analysis.results_df[results_analysis.results_df['openaccess'].astype(str).str.lower() == 'true']
+    # entries sharing a DOI would be saved to the same file, so each DOI is only downloaded once
+    missing_doi = open_access['doi'].isna() | (open_access['doi'].astype(str).str.strip() == '')
+    open_access = open_access[missing_doi | ~open_access['doi'].duplicated()]
+    missing_doi = missing_doi[open_access.index].to_numpy()
+    dois = list(open_access['doi'])
+    if api_key is not None:
+        # requests encodes the DOI, and the API key is only added to the request in download_document, so that it is not exposed in the results
+        urls = [None if missing else requests.Request('GET', 'https://api.springernature.com/openaccess/jats', params={'q': 'doi:' + str(doi), 'p': 1}).prepare().url for doi, missing in zip(dois, missing_doi)]
+        if file_extension is None:
+            file_extension = '.xml'
+    else:
+        urls = list(open_access[url_column])
+    os.makedirs(directory, exist_ok=True)
+    file_paths = [os.path.join(directory, str(doi).replace('/', '_')) for doi in dois]
+    to_download = np.flatnonzero(~missing_doi)
+
+    host_semaphores = {urlparse(str(urls[i])).netloc: threading.Semaphore(max_per_host) for i in to_download}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        downloaded = list(executor.map(lambda i: download_document(urls[i], file_paths[i], host_semaphores[urlparse(str(urls[i])).netloc], chunk_size, api_key, file_extension), to_download))
+    total_seconds = time.perf_counter() - start
+
+    results = [{'url': url, 'file': None, 'status': 'failed', 'bytes': 0, 'seconds': 0.0, 'error': 'missing DOI'} for url in urls]
+    for i, result in zip(to_download, downloaded):
+        results[i] = result
+    downloads = pd.DataFrame(results, columns=['url', 'file', 'status', 'bytes', 'seconds', 'error'])
+    downloads.insert(0, 'doi', dois)
+    total_mb = downloads['bytes'].sum() / 1e6
+    status_counts = downloads['status'].value_counts()
+    print(f"Downloaded {status_counts.get('downloaded', 0)} documents ({total_mb:.2f} MB) in {total_seconds:.2f} s: {total_mb / max(total_seconds, 1e-9):.2f} MB/s. Skipped {status_counts.get('skipped', 0)}, failed {status_counts.get('failed', 0)}.")
+    return downloads
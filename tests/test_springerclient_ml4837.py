@@ -2,6 +2,7 @@
 #sys.path.insert(0, '../src/')
 from springerclient_ml4837 import ResultsAnalysis
 from springerclient_ml4837 import check_parameters
+from springerclient_ml4837 import download_documents
 
 # did not work:
 # from springerclient_ml4837 import springerclient_ml4837
@@ -15,6 +16,11 @@ from springerclient_ml4837 import check_parameters
 import pytest
 import requests.exceptions
 import pandas as pd
+import numpy as np
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 df_list = [['Article',
   'doi:10.1186/gb-spotlight-20001229-02',
@@ -210,3 +216,228 @@ def test_RA_add_row(test_df):
  
 
 
+def test_RA_search_author(test_df):
+    """
+    Checks if search_author (a ResultsAnalysis member function) only returns entries
+    for which the author's full name is one of the creators
+    """
+    assert list(test_df.search_author('Wells, William').index) == [0, 4]
+    assert test_df.search_author('Wells').empty
+
+def test_RA_top_authors(test_df):
+    """
+    Checks if top_authors (a ResultsAnalysis member function) counts authors correctly,
+    including after add_row changes results_df
+    """
+    assert test_df.top_authors(1).to_dict() == {'Wells, William': 2}
+    test_df.add_row({'creators': 'Wells, William; Parks, William C'})
+    assert test_df.top_authors(1).to_dict() == {'Wells, William': 3}
+
+def test_RA_get_coauthors(test_df):
+    """
+    Checks if get_coauthors (a ResultsAnalysis member function) returns the coauthors of an author,
+    and raises a ValueError for an author who is not a creator of any entry
+    """
+    assert test_df.get_coauthors('Parks, William C').to_dict() == {'Shapiro, Steven D': 1}
+    assert test_df.get_coauthors('Wells, William').empty
+    with pytest.raises(ValueError) as errorinfo:
+        test_df.get_coauthors('Wells')
+
+def test_RA_author_index_large_collaboration():
+    """
+    Checks if search_author (a ResultsAnalysis member function) stays fast for rows with thousands of creators,
+    by not building the co-authorship matrix, and if get_coauthors leaves those rows out of the matrix
+    """
+    collaboration = '; '.join(f'Author, {i}' for i in range(3000))
+    large_df = ResultsAnalysis(pd.DataFrame({'creators': ['Wells, William; Parks, William C', collaboration, collaboration, collaboration]}))
+    start = time.perf_counter()
+    assert list(large_df.search_author('Wells, William').index) == [0]
+    assert list(large_df.top_authors(1)) == [3]
+    assert time.perf_counter() - start < 2
+    assert large_df.coauthor_matrix is None
+    assert large_df.get_coauthors('Wells, William').to_dict() == {'Parks, William C': 1}
+    assert large_df.get_coauthors('Author, 0').empty
+
+def test_RA_find_near_duplicates(test_df):
+    """
+    Checks if find_near_duplicates (a ResultsAnalysis member function) clusters an abstract
+    with a nearly identical copy added by add_row, but not with unrelated or empty abstracts
+    """
+    assert test_df.find_near_duplicates().empty
+    test_df.add_row({'doi': 'copy', 'abstract': df_list[2][20].replace('lung', 'lungs')})
+    test_df.add_row({'doi': 'empty'})
+    near_duplicates = test_df.find_near_duplicates()
+    assert list(near_duplicates['doi']) == ['10.1186/rr33', 'copy']
+    assert near_duplicates['duplicateCluster'].nunique() == 1
+
+def test_RA_find_near_duplicates_shared_bucket(test_df):
+    """
+    Checks if find_near_duplicates (a ResultsAnalysis member function) compares every pair of rows
+    sharing a bucket, not only each row with the first row of the bucket
+    """
+    signatures = np.arange(5 * 16, dtype=np.uint64).reshape(5, 16) + 1000
+    # rows 0, 1 and 2 share band 0; rows 1 and 2 agree on 5 of the 8 values of band 1 (13/16 overall)
+    signatures[:3, :8] = np.arange(8)
+    signatures[0, 8:] = np.arange(100, 108)
+    signatures[1, 8:] = np.arange(200, 208)
+    signatures[2, 8:] = np.arange(200, 208)
+    signatures[2, 13:] = [300, 301, 302]
+    test_df.minhash_signatures = signatures
+    test_df.minhash_params = {'column': 'abstract', 'num_perm': 16, 'shingle_size': 5}
+    near_duplicates = test_df.find_near_duplicates(threshold=0.8, bands=2)
+    assert list(near_duplicates.index) == [1, 2]
+    assert near_duplicates['duplicateCluster'].nunique() == 1
+
+def test_RA_find_near_duplicates_boilerplate():
+    """
+    Checks if find_near_duplicates (a ResultsAnalysis member function) stays fast when thousands of rows
+    share the same boilerplate abstract, and still finds the other near-duplicates
+    """
+    abstracts = ['Correction to this article has been published.'] * 3000 + [df_list[2][20], df_list[2][20].replace('lung', 'lungs'), df_list[3][20]]
+    boilerplate_df = ResultsAnalysis(pd.DataFrame({'abstract': abstracts}))
+    start = time.perf_counter()
+    near_duplicates = boilerplate_df.find_near_duplicates()
+    assert time.perf_counter() - start < 5
+    assert near_duplicates['duplicateCluster'].value_counts().to_dict() == {0: 3000, 1: 2}
+    assert list(near_duplicates.index[-2:]) == [3000, 3001]
+
+def test_RA_minhash_incremental(test_df):
+    """
+    Checks if the signatures updated by add_row and remove_rows (ResultsAnalysis member functions)
+    match the signatures computed from scratch by compute_minhash
+    """
+    test_df.compute_minhash()
+    test_df.add_row({'abstract': 'A new abstract'})
+    test_df.add_row({'title': 'No abstract'})
+    test_df.remove_rows(1)
+    updated = test_df.minhash_signatures.copy()
+    assert (updated == test_df.compute_minhash()).all()
+
+
+class StubDocumentHandler(BaseHTTPRequestHandler):
+    """
+    Serves a document for any path, with an ETag, and records the number of concurrent requests.
+    """
+    body = b'<article>' + b'x' * 200000 + b'</article>'
+    etag = '"v1"'
+    content_type = 'application/xml'
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+    requests_served = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+            cls.requests_served += 1
+        time.sleep(0.05)
+        if self.headers.get('If-None-Match') == cls.etag:
+            self.send_response(304)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('ETag', cls.etag)
+            self.send_header('Content-Type', cls.content_type)
+            self.send_header('Content-Length', str(len(cls.body)))
+            self.end_headers()
+            self.wfile.write(cls.body)
+        with cls.lock:
+            cls.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    """
+    Starts a local stub server for the download tests, and returns its base URL.
+    """
+    StubDocumentHandler.active = StubDocumentHandler.max_active = StubDocumentHandler.requests_served = 0
+    StubDocumentHandler.content_type = 'application/xml'
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubDocumentHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+def test_download_documents(test_df, stub_server, tmp_path):
+    """
+    Checks if download_documents only downloads the open access entries, and skips
+    files that are unchanged (based on their ETag) when called again
+    """
+    test_df.results_df['url'] = [f'{stub_server}/{i}' for i in range(len(test_df.results_df))]
+    downloads = download_documents(test_df, str(tmp_path))
+    assert list(downloads['doi']) == ['10.1186/rr33', '10.1186/rr37']
+    assert list(downloads['status']) == ['downloaded', 'downloaded']
+    with open(os.path.join(tmp_path, '10.1186_rr33.xml'), 'rb') as f:
+        assert f.read() == StubDocumentHandler.body
+    downloads = download_documents(test_df, str(tmp_path))
+    assert list(downloads['status']) == ['skipped', 'skipped']
+    assert downloads['bytes'].sum() == 0
+    assert (downloads['seconds'] > 0).all()
+
+def test_download_documents_per_host_limit(test_df, stub_server, tmp_path):
+    """
+    Checks if download_documents never makes more than max_per_host concurrent requests to one host
+    """
+    for i in range(6):
+        test_df.add_row({'doi': f'10.0/{i}', 'openaccess': 'true'})
+    test_df.results_df['url'] = f'{stub_server}/document'
+    downloads = download_documents(test_df, str(tmp_path), max_workers=8, max_per_host=2)
+    assert (downloads['status'] == 'downloaded').all()
+    assert StubDocumentHandler.requests_served == 8
+    assert StubDocumentHandler.max_active <= 2
+
+def test_download_documents_duplicate_dois(test_df, stub_server, tmp_path):
+    """
+    Checks if download_documents downloads a repeated DOI only once, and reports entries
+    without a DOI as failed instead of saving them to the same file
+    """
+    test_df.remove_rows(5)
+    for doi in [None, None, '10.1/a', '10.1/a']:
+        test_df.add_row({'doi': doi, 'openaccess': 'true'})
+    test_df.results_df['url'] = f'{stub_server}/document'
+    downloads = download_documents(test_df, str(tmp_path))
+    assert list(downloads['status']) == ['failed', 'failed', 'downloaded']
+    assert list(downloads['error'][:2]) == ['missing DOI', 'missing DOI']
+    assert StubDocumentHandler.requests_served == 1
+    assert sorted(os.listdir(tmp_path)) == ['10.1_a.xml', '10.1_a.xml.etag']
+
+def test_download_documents_api_key(test_df, tmp_path, monkeypatch):
+    """
+    Checks if download_documents sends the API key with each request, but does not include it in the
+    URLs of the returned DataFrame
+    """
+    sent_urls = []
+    def refuse_request(url, params=None, **kwargs):
+        sent_urls.append(requests.Request('GET', url, params=params).prepare().url)
+        raise requests.exceptions.ConnectionError('no network in tests')
+    monkeypatch.setattr(requests, 'get', refuse_request)
+    test_df.add_row({'doi': '10.1000/a#b&c', 'openaccess': 'true'})
+    downloads = download_documents(test_df, str(tmp_path), api_key='secret_key')
+    assert not downloads['url'].str.contains('secret_key').any()
+    assert list(downloads['url']) == ['https://api.springernature.com/openaccess/jats?q=doi%3A10.1186%2Frr33&p=1', 'https://api.springernature.com/openaccess/jats?q=doi%3A10.1186%2Frr37&p=1', 'https://api.springernature.com/openaccess/jats?q=doi%3A10.1000%2Fa%23b%26c&p=1']
+    assert sorted(sent_urls) == sorted(url + '&api_key=secret_key' for url in downloads['url'])
+
+def test_download_documents_content_type(test_df, stub_server, tmp_path):
+    """
+    Checks if download_documents takes the file extension from the Content-Type of the response
+    when api_key is not specified, and recognises the file as already downloaded when called again
+    """
+    StubDocumentHandler.content_type = 'text/html; charset=utf-8'
+    test_df.results_df['url'] = f'{stub_server}/document'
+    downloads = download_documents(test_df, str(tmp_path))
+    assert list(downloads['file']) == [os.path.join(tmp_path, '10.1186_rr33.html'), os.path.join(tmp_path, '10.1186_rr37.html')]
+    downloads = download_documents(test_df, str(tmp_path))
+    assert list(downloads['status']) == ['skipped', 'skipped']
+    assert StubDocumentHandler.requests_served == 4
+
+def test_download_documents_error(test_df, tmp_path):
+    """
+    Checks if entering an inappropriate value for max_per_host in download_documents will raise a ValueError
+    """
+    with pytest.raises(ValueError) as errorinfo:
+        download_documents(test_df, str(tmp_path), max_per_host=0)